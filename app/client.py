@@ -1,6 +1,9 @@
 import requests
-import base64
 import logging
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 class HTTPClient:
@@ -9,6 +12,9 @@ class HTTPClient:
     # Class constants
     CONTENT_TYPE = "application/xml"
     TIMEOUT = 15
+    MAX_RETRIES = 3
+    RETRY_BACKOFF = 0.5  # seconds, doubled per retry
+    RETRY_STATUS = (500, 502, 503, 504)
     XML_TEMPLATE = """
         <methodCall>
             <methodName>{method}</methodName>
@@ -32,26 +38,53 @@ class HTTPClient:
         self.username = username
         self.password = password
         self.logger = logger
+        self._headers = {
+            "Content-Type": self.CONTENT_TYPE,
+            "Connection": "keep-alive",
+        }
+        self._session = self._create_session()
+        self._server_url = f"http://{self.xmlRpcServer}"
+        prefix, suffix = self.XML_TEMPLATE.split("{client_id}")
+        self._body_init_prefix = prefix.format(
+            method="init", server=self._server_url
+        ).encode("utf-8")
+        self._body_init_suffix = suffix.encode("utf-8")
+        self._unregister_body = self._create_request_body()
 
-        self.logger.debug(f"Initialized client with server: {self.ccu}")
+        self.logger.debug("Initialized client with server: %s", self.ccu)
 
-    def _create_request_body(self, method: str, client_id: str = "") -> str:
-        """Create XML request body."""
-        return self.XML_TEMPLATE.format(
-            method=method, server=f"http://{self.xmlRpcServer}", client_id=client_id
+    def _create_session(self) -> requests.Session:
+        """Create HTTP session with a persistent connection pool."""
+        session = requests.Session()
+        session.auth = (self.username, self.password)
+        # urllib3 keeps one pool per host:port, each CCU interface has its own port
+        endpoints = {urlsplit(client["url"]).netloc for client in self.ccu}
+        # Read errors are not retried, a slow CCU would get the same init repeatedly
+        retry = Retry(
+            total=self.MAX_RETRIES,
+            read=0,
+            backoff_factor=self.RETRY_BACKOFF,
+            status_forcelist=self.RETRY_STATUS,
+            allowed_methods=frozenset(["POST"]),
+        )
+        adapter = HTTPAdapter(
+            pool_connections=max(len(endpoints), 1),
+            pool_maxsize=max(len(self.ccu), 1),
+            max_retries=retry,
         )
+        session.mount("http://", adapter)
+        return session
 
-    def _basic_auth(self) -> str:
-        return base64.b64encode(f"{self.username}:{self.password}".encode()).decode()
+    def _create_request_body(self, client_id: str = "") -> bytes:
+        """Create encoded XML init request body."""
+        return b"".join(
+            (self._body_init_prefix, client_id.encode("utf-8"), self._body_init_suffix)
+        )
 
-    def _make_request(self, body: str, url: str) -> requests.Response:
+    def _make_request(self, body: bytes, url: str) -> requests.Response:
         """Make HTTP request with error handling."""
-        headers = {
-            "Content-Type": self.CONTENT_TYPE,
-            "Authorization": f"Basic {self._basic_auth()}",
-        }
-        response = requests.post(
-            url=url, headers=headers, data=body, timeout=self.TIMEOUT
+        response = self._session.post(
+            url=url, headers=self._headers, data=body, timeout=self.TIMEOUT
         )
         response.raise_for_status()
         return response
@@ -59,42 +92,64 @@ class HTTPClient:
     def _register(self, client: dict) -> None:
         """Register client with HomeMatic CCU."""
         self.logger.debug(
-            f"Registering {client['register_id']} with HomeMatic CCU at {client['url']}"
+            "Registering %s with HomeMatic CCU at %s",
+            client["register_id"],
+            client["url"],
         )
         try:
-            body = self._create_request_body("init", client["register_id"])
+            body = self._create_request_body(client["register_id"])
             response = self._make_request(body, client["url"])
 
             if response.status_code == 200:
                 self.logger.info(
-                    f"Registration successful with clientID: {client['register_id']}, "
-                    f"server: {self.xmlRpcServer} at {client['url']}"
+                    "Registration successful with clientID: %s, server: %s at %s",
+                    client["register_id"],
+                    self.xmlRpcServer,
+                    client["url"],
                 )
         except requests.RequestException as e:
-            self.logger.error(f"Registration failed: {str(e)}")
+            self.logger.error("Registration failed: %s", e)
             raise
 
     def _unregister(self, client: dict) -> None:
         """Unregister client from HomeMatic CCU."""
-        self.logger.debug(f"Unregistering from HomeMatic CCU at {client['url']}")
+        self.logger.debug("Unregistering from HomeMatic CCU at %s", client["url"])
         try:
-            body = self._create_request_body("init", "")
-            response = self._make_request(body, client["url"])
+            response = self._make_request(self._unregister_body, client["url"])
 
             if response.status_code == 200:
                 self.logger.info(
-                    f"Unregistration clientID: {client['register_id']}, "
-                    f"successful with Homematic CCU at {client['url']}"
+                    "Unregistration clientID: %s, successful with Homematic CCU at %s",
+                    client["register_id"],
+                    client["url"],
                 )
         except requests.RequestException as e:
-            self.logger.error(f"Unregistration failed: {str(e)}")
+            self.logger.error("Unregistration failed: %s", e)
 
     def register_all(self) -> None:
-        """Register all clients with HomeMatic CCU."""
-        for client in self.ccu:
-            self._register(client)
+        """Register all clients with HomeMatic CCU concurrently."""
+        if not self.ccu:
+            return
+        with ThreadPoolExecutor(max_workers=len(self.ccu)) as executor:
+            futures = [executor.submit(self._register, client) for client in self.ccu]
+        errors = [f.exception() for f in futures if f.exception()]
+        if errors:
+            raise errors[0]
 
     def unregister_all(self) -> None:
-        """Unregister all clients from HomeMatic CCU."""
-        for client in self.ccu:
-            self._unregister(client)
+        """Unregister all clients from HomeMatic CCU concurrently."""
+        if not self.ccu:
+            return
+        with ThreadPoolExecutor(max_workers=len(self.ccu)) as executor:
+            futures = [executor.submit(self._unregister, client) for client in self.ccu]
+        for client, future in zip(self.ccu, futures):
+            if future.exception():
+                self.logger.error(
+                    "Unregistration of %s failed: %s",
+                    client["register_id"],
+                    future.exception(),
+                )
+
+    def close(self) -> None:
+        """Close HTTP session and release pooled connections."""
+        self._session.close()
@@ -1,11 +1,61 @@
 import sqlite3
 from sqlite3 import Error
 import logging
+import time
+
+CREATE_DEVICE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS devices (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+        interface TEXT NOT NULL,
+        device_id TEXT DEFAULT '',
+        param TEXT DEFAULT '',
+        value TEXT DEFAULT '',
+        UNIQUE(device_id, param)
+    );
+"""
+CREATE_DEVICE_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_device_param ON devices(device_id, param);
+"""
+UPSERT_DEVICE_SQL = """
+    INSERT INTO devices (interface, device_id, param, value, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(device_id, param)
+    DO UPDATE SET
+        value = excluded.value,
+        interface = excluded.interface,
+        timestamp = excluded.timestamp;
+"""
+
+
+# (epoch second, formatted second), stale reads from other threads are harmless
+_ts_cache = (0, "")
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time in SQLite's strftime('%Y-%m-%d %H:%M:%f') format."""
+    global _ts_cache
+    now = time.time()
+    second = int(now)
+    cached = _ts_cache
+    if cached[0] != second:
+        cached = (second, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(second)))
+        _ts_cache = cached
+    return "%s.%03d" % (cached[1], int(now * 1000) % 1000)
 
 
 class Database:
     """SQLite database manager."""
 
+    # Class constants
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=67108864",
+    )
+    CACHED_STATEMENTS = 512
+
     def __init__(self, db_file: str, logger: logging.Logger) -> None:
         self.db_file = db_file
         self.logger = logger
@@ -14,49 +64,79 @@ class Database:
 
     def _create_device_table(self) -> None:
         """Create devices table if it doesn't exist."""
-        create_table = """
-            CREATE TABLE IF NOT EXISTS devices (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
-                interface TEXT NOT NULL,
-                device_id TEXT DEFAULT '',
-                param TEXT DEFAULT '',
-                value TEXT DEFAULT '',
-                UNIQUE(device_id, param)
-            );
-        """
-        self.execute(create_table)
-
-        create_index = """
-            CREATE INDEX IF NOT EXISTS idx_device_param ON devices(device_id, param);
-        """
-        self.execute(create_index)
+        self.execute(CREATE_DEVICE_TABLE_SQL)
+        self.execute(CREATE_DEVICE_INDEX_SQL)
 
     def connect(self) -> None:
         """Create database connection and cursor."""
         try:
-            self.conn = sqlite3.connect(self.db_file)
+            # Autocommit mode, transactions are opened explicitly in _begin()
+            self.conn = sqlite3.connect(
+                self.db_file,
+                cached_statements=self.CACHED_STATEMENTS,
+                isolation_level=None,
+                # Shared with the XML-RPC server thread, callers serialize access
+                check_same_thread=False,
+            )
             self.cur = self.conn.cursor()
+            for pragma in self.PRAGMAS:
+                self.cur.execute(pragma)
         except sqlite3.Error as e:
-            self.logger.error(f"Failed to connect to database: {e}")
+            self.logger.error("Failed to connect to database: %s", e)
             raise
 
     def execute(self, query: str, params: tuple = None) -> None:
-        """Execute SQL query with parameters."""
+        """Execute SQL query with parameters, committing immediately."""
         if not self.cur:
             raise RuntimeError("No database cursor. Call connect() first")
         try:
+            # Autocommit mode, the statement is committed on its own
             if params:
                 self.cur.execute(query, params)
             else:
                 self.cur.execute(query)
-            self.conn.commit()
         except sqlite3.Error as e:
-            self.logger.error(f"Failed to execute query: {e}")
+            self.logger.error("Failed to execute query: %s", e)
+            raise
+
+    def execute_many(self, query: str, seq_of_params) -> None:
+        """Execute SQL query for each parameter tuple and commit once."""
+        if not self.cur:
+            raise RuntimeError("No database cursor. Call connect() first")
+        try:
+            self._begin()
+            self.cur.executemany(query, seq_of_params)
+        except sqlite3.Error as e:
+            self.logger.error("Failed to execute query: %s", e)
+            if self.conn.in_transaction:
+                self.cur.execute("ROLLBACK")
+            raise
+        self.flush()
+
+    def upsert_devices(self, rows) -> None:
+        """Insert or update a batch of device rows in one transaction."""
+        # One timestamp per batch, rows are drained within milliseconds
+        ts = _utc_timestamp()
+        self.execute_many(UPSERT_DEVICE_SQL, [(*row, ts) for row in rows])
+
+    def _begin(self) -> None:
+        """Open a transaction unless one is already in progress."""
+        if not self.conn.in_transaction:
+            self.cur.execute("BEGIN")
+
+    def flush(self) -> None:
+        """Commit pending changes."""
+        if not self.conn or not self.conn.in_transaction:
+            return
+        try:
+            self.cur.execute("COMMIT")
+        except sqlite3.Error as e:
+            self.logger.error("Failed to commit transaction: %s", e)
             raise
 
     def close(self) -> None:
-        """Close database connection."""
+        """Commit pending changes and close database connection."""
+        self.flush()
         if self.cur:
             self.cur.close()
         if self.conn:
@@ -1,15 +1,33 @@
-import time
 import logging
 import signal
 import sys
 import threading
 from contextlib import contextmanager
+from dataclasses import dataclass
 from typing import Optional, Tuple, Dict, Any
 from dotenv import dotenv_values
 
 from server import XMLRPCServer
 from client import HTTPClient
-from notify import ready, stopping, watchdog, status
+from notify import ready, stopping, watchdog, status, WatchdogPinger
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Typed application settings, parsed once from the environment file."""
+
+    server_ip: str
+    server_port: int
+    allowed_clients: Optional[Tuple[str, ...]]
+    hm_server_ip: str
+    hm_username: str
+    hm_password: str
+    hm_devices: Optional[Tuple[str, ...]]
+    db_file: str
+    subscribe_to: Optional[Tuple[str, ...]]
+    state_device_ids: Optional[Tuple[str, ...]] = None
+    ccu_parameters: Optional[Tuple[str, ...]] = None
+    log_level: str = "INFO"
 
 
 class Config:
@@ -18,6 +36,30 @@ class Config:
     def __init__(self, env_file: str = ".env"):
         self.config: Dict[str, Any] = dotenv_values(env_file)
         self.validate()
+        self.settings = self._parse()
+
+    def _parse(self) -> Settings:
+        """Build typed settings from the raw configuration values."""
+        return Settings(
+            server_ip=self.config["SERVER_IP"],
+            server_port=int(self.config["SERVER_PORT"]),
+            allowed_clients=self._to_tuple("ALLOWED_CLIENTS"),
+            hm_server_ip=self.config["HM_SERVER_IP"],
+            hm_username=self.config["HM_USERNAME"],
+            hm_password=self.config["HM_PASSWORD"],
+            hm_devices=self._to_tuple("HM_DEVICES"),
+            db_file=self.config["DB_FILE"],
+            subscribe_to=self._to_tuple("SUBSCRIBE_TO"),
+            state_device_ids=self._to_tuple("STATE_DEVICE_IDS"),
+            ccu_parameters=self._to_tuple("CCU_PARAMETERS"),
+            log_level=self.config.get("LOG_LEVEL") or "INFO",
+        )
+
+    def _to_tuple(self, key: str) -> Optional[Tuple[str, ...]]:
+        """Convert comma-separated value to tuple, handling edge cases."""
+        value = (self.config.get(key) or "").strip()
+        items = tuple(item.strip() for item in value.split(",") if item.strip())
+        return items or None
 
     def validate(self) -> None:
         """Validate required configuration values."""
@@ -35,49 +77,53 @@ class Config:
         missing = [key for key in required_keys if key not in self.config]
         if missing:
             raise ValueError(f"Missing required config keys: {missing}")
+        # A blank allowlist would disable IP filtering on the server
+        if not self._to_tuple("ALLOWED_CLIENTS"):
+            raise ValueError("ALLOWED_CLIENTS must list at least one client")
+        subscribe_to = self._to_tuple("SUBSCRIBE_TO")
+        if not subscribe_to:
+            raise ValueError("SUBSCRIBE_TO must list at least one interface")
+        known = {interface for interface, _, _ in XMLRPC_HOMEMATIC.CCU_TYPES}
+        unknown = [interface for interface in subscribe_to if interface not in known]
+        if unknown:
+            raise ValueError(f"Unknown SUBSCRIBE_TO interfaces: {unknown}")
 
 
 class XMLRPC_HOMEMATIC:
     """HomeMatic XML-RPC Server and Client Manager."""
 
-    STARTUP_DELAY = 1  # seconds
+    IDLE_INTERVAL = 15  # seconds, main loop wake period without a watchdog
     MAX_RETRIES = 3
     RETRY_DELAY = 2  # seconds
+    # (interface, port, path)
+    CCU_TYPES = (
+        ("BidCos-RF", 2001, ""),
+        ("HmIP-RF", 2010, ""),
+        ("VirtualDevices", 9292, "/groups"),
+    )
 
     def __init__(self):
-        self.config = Config().config
+        self.settings = Config().settings
         self.logger = self._setup_logging()
         self.server: Optional[XMLRPCServer] = None
         self.client: Optional[HTTPClient] = None
         self.client_bidcos: Optional[Dict[str, Any]] = None
-        self.CCU_TYPES = {
-            "BidCos-RF": {
-                "register_id": "BidCos-RF",
-                "url": f"http://{self.config['HM_SERVER_IP']}:2001",
-            },
-            "HmIP-RF": {
-                "register_id": "HmIP-RF",
-                "url": f"http://{self.config['HM_SERVER_IP']}:2010",
-            },
-            "VirtualDevices": {
-                "register_id": "VirtualDevices",
-                "url": f"http://{self.config['HM_SERVER_IP']}:9292/groups",
-            },
-        }
+        self._ccu = self._build_ccu()
         self._shutdown_event = threading.Event()
 
-    def _convert_to_tuple(self, key: str) -> Optional[Tuple[str, ...]]:
-        """Convert comma-separated string to tuple, handling edge cases."""
-        value = self.config.get(key, "").strip()
-        if not value:
-            return None
-
-        items = [item.strip() for item in value.split(",") if item.strip()]
-        return tuple(items) if items else None
+    def _build_ccu(self) -> Tuple[Dict[str, str], ...]:
+        """Build registration targets for the subscribed CCU interfaces."""
+        subscribe_to = self.settings.subscribe_to or ()
+        ip = self.settings.hm_server_ip
+        return tuple(
+            {"register_id": interface, "url": f"http://{ip}:{port}{path}"}
+            for interface, port, path in self.CCU_TYPES
+            if interface in subscribe_to
+        )
 
     def _setup_logging(self) -> None:
         """Configure logging for the application."""
-        log_level = getattr(logging, self.config.get("LOG_LEVEL", "INFO").upper())
+        log_level = getattr(logging, self.settings.log_level.upper())
         logging.basicConfig(
             level=log_level,
             format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -92,58 +138,35 @@ class XMLRPC_HOMEMATIC:
     def setup(self) -> None:
         """Initialize server and clients."""
         logging.debug("Starting setup...")
-        device_tuple = self._convert_to_tuple("HM_DEVICES")
-        clients_tuple = self._convert_to_tuple("SUBSCRIBE_TO")
-        logging.debug(f"Devices: {device_tuple}, Clients: {clients_tuple}")
-        ccu = [
-            self.CCU_TYPES[client]
-            for client in clients_tuple
-            if client in self.CCU_TYPES
-        ]
+        device_tuple = self.settings.hm_devices
+        logging.debug("Devices: %s, Clients: %s", device_tuple, self._ccu)
         self._setup_server(device_tuple)
-        self._setup_client(ccu)
+        self._setup_client(self._ccu)
 
     def _setup_server(self, device_tuple) -> None:
         """Initialize XML-RPC server."""
         self.server = XMLRPCServer(
-            host=self.config["SERVER_IP"],
-            port=int(self.config["SERVER_PORT"]),
+            host=self.settings.server_ip,
+            port=self.settings.server_port,
             logger=self.server_logger,
             ccu_device_ids=device_tuple,
-            db_file=self.config["DB_FILE"],
-            allowed_clients=self._convert_to_tuple("ALLOWED_CLIENTS"),
+            db_file=self.settings.db_file,
+            allowed_clients=self.settings.allowed_clients,
             server_id="xmlrpc-server",
-            ccu_parameters=self._convert_to_tuple("CCU_PARAMETERS"),
-            state_device_ids=self._convert_to_tuple("STATE_DEVICE_IDS"),
+            ccu_parameters=self.settings.ccu_parameters,
+            state_device_ids=self.settings.state_device_ids,
         )
 
     def _setup_client(self, ccu) -> HTTPClient:
         """Create and configure HTTP client."""
         self.client = HTTPClient(
             ccu=ccu,
-            xmlRpcServer=f"{self.config['SERVER_IP']}:{self.config['SERVER_PORT']}",
-            username=self.config["HM_USERNAME"],
-            password=self.config["HM_PASSWORD"],
+            xmlRpcServer=f"{self.settings.server_ip}:{self.settings.server_port}",
+            username=self.settings.hm_username,
+            password=self.settings.hm_password,
             logger=self.client_logger,
         )
 
-    def start_watchdog(self):
-        """Start watchdog notification thread."""
-
-        def _watchdog_notify():
-            while not self._shutdown_event.is_set():
-                watchdog()
-                time.sleep(15)  # Half of WatchdogSec
-
-        self._watchdog_thread = threading.Thread(target=_watchdog_notify, daemon=True)
-        self._watchdog_thread.start()
-
-    def stop_watchdog(self):
-        """Stop watchdog notification thread."""
-        if self._watchdog_thread and self._watchdog_thread.is_alive():
-            self._shutdown_event.set()
-            self._watchdog_thread.join(timeout=2.0)
-
 
 @contextmanager
 def lifespan(app: XMLRPC_HOMEMATIC):
@@ -155,15 +178,15 @@ def lifespan(app: XMLRPC_HOMEMATIC):
 
         logging.debug("=============== Starting XML-RPC server... ===============")
         status("Starting XML-RPC server...")
+        # Socket listens from construction, CCU callbacks queue until served
         app.server.start()
-        time.sleep(app.STARTUP_DELAY)
 
         logging.info("================== Registering clients... =================")
         status("Registering clients...")
         app.client.register_all()
 
-        # Start watchdog and notify systemd we're ready
-        app.start_watchdog()
+        # Send first watchdog ping and notify systemd we're ready
+        watchdog()
         ready()
         status("Running")
 
@@ -171,7 +194,7 @@ def lifespan(app: XMLRPC_HOMEMATIC):
         yield
 
     except Exception as e:
-        logging.error(f"Error during startup: {e}", exc_info=True)
+        logging.error("Error during startup: %s", e, exc_info=True)
         status(f"Error: {str(e)}")
         raise
 
@@ -179,12 +202,13 @@ def lifespan(app: XMLRPC_HOMEMATIC):
         logging.info("================= Graceful shutdown... ==================")
         status("Shutting down...")
         stopping()
-        app.stop_watchdog()
 
         try:
             app.client.unregister_all()
         except Exception as e:
-            logging.error(f"Error unregistering client: {e}")
+            logging.error("Error unregistering client: %s", e)
+        if app.client:
+            app.client.close()
         if app.server:
             app.server.stop()
 
@@ -193,20 +217,22 @@ def main():
     try:
         app = XMLRPC_HOMEMATIC()
     except Exception as e:
-        logging.error(f"Failed to initialize application: {e}", exc_info=True)
+        logging.error("Failed to initialize application: %s", e, exc_info=True)
         sys.exit(1)
 
-    signal.signal(signal.SIGINT, lambda s, f: sys.exit(0))
+    signal.signal(signal.SIGINT, lambda s, f: app._shutdown_event.set())
+    signal.signal(signal.SIGTERM, lambda s, f: app._shutdown_event.set())
 
     try:
         with lifespan(app):
-            try:
-                while not app._shutdown_event.is_set():
-                    time.sleep(1)
-            except KeyboardInterrupt:
-                app._shutdown_event.set()
+            # Watchdog is driven from the idle main loop, no extra thread
+            pinger = WatchdogPinger()
+            # Wake twice per ping interval so the pinger does the gating
+            timeout = pinger.interval / 2 if pinger.interval else app.IDLE_INTERVAL
+            while not app._shutdown_event.wait(timeout=timeout):
+                pinger.ping()
     except Exception as e:
-        logging.error(f"Application failed: {e}", exc_info=True)
+        logging.error("Application failed: %s", e, exc_info=True)
         sys.exit(1)
 
 
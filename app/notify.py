@@ -1,31 +1,49 @@
 import socket
 import os
+import threading
+import time
 from typing import Optional
 
+# Notify socket is opened once and reused for every message
+_NOTIFY_SOCK: Optional[socket.socket] = None
+_NOTIFY_ADDR: Optional[str] = None
+_NOTIFY_LOCK = threading.Lock()
+
+
+def _notify_socket() -> Optional[socket.socket]:
+    """Return the cached notify socket, creating it on first use."""
+    global _NOTIFY_SOCK, _NOTIFY_ADDR
+    if _NOTIFY_SOCK is not None:
+        return _NOTIFY_SOCK
+
+    with _NOTIFY_LOCK:
+        if _NOTIFY_SOCK is None:
+            notify_socket = os.environ.get("NOTIFY_SOCKET")
+            if not notify_socket:
+                return None
+
+            # Handle abstract namespace socket
+            if notify_socket.startswith("@"):
+                notify_socket = "\0" + notify_socket[1:]
+
+            _NOTIFY_ADDR = notify_socket
+            _NOTIFY_SOCK = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    return _NOTIFY_SOCK
+
 
 def sd_notify(message: str) -> bool:
     """Send notification to systemd."""
-    sock: Optional[socket.socket] = None
     try:
-        notify_socket = os.environ.get("NOTIFY_SOCKET")
-        if not notify_socket:
+        sock = _notify_socket()
+        if sock is None:
             return False
 
-        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
-
-        # Handle abstract namespace socket
-        if notify_socket.startswith("@"):
-            notify_socket = "\0" + notify_socket[1:]
-
-        sock.connect(notify_socket)
-        sock.sendall(message.encode())
+        # Unconnected sendto keeps the socket safe to share between threads
+        sock.sendto(message.encode(), _NOTIFY_ADDR)
         return True
     except Exception as e:
         print(f"Failed to notify systemd: {e}")
         return False
-    finally:
-        if sock:
-            sock.close()
 
 
 def watchdog():
@@ -33,6 +51,25 @@ def watchdog():
     return sd_notify("WATCHDOG=1")
 
 
+class WatchdogPinger:
+    """Send watchdog pings at most every WATCHDOG_USEC / 2."""
+
+    def __init__(self) -> None:
+        self.usec = int(os.environ.get("WATCHDOG_USEC", "0") or 0)
+        self.interval: Optional[float] = self.usec / 2_000_000 if self.usec else None
+        self.last = 0.0
+
+    def ping(self) -> bool:
+        """Send a watchdog ping if the interval has elapsed."""
+        if not self.interval:
+            return False
+        now = time.monotonic()
+        if now - self.last < self.interval:
+            return True
+        self.last = now
+        return watchdog()
+
+
 def ready():
     """Notify service is ready."""
     return sd_notify("READY=1")
@@ -1,14 +1,37 @@
+import sys
 import threading
 import logging
+import queue
+import itertools
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import Future, ThreadPoolExecutor
 from requests.exceptions import RequestException
-from typing import Optional, Dict, Any, Tuple, List
+from socketserver import ThreadingMixIn
+from typing import Optional, Dict, Any, Tuple, List, Set
 from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
 from ipaddress import ip_address, ip_network
-from threading import Lock
 
 from db import Database
 
+# Marks the end of the write queue
+_SENTINEL = object()
+
+
+class _Evt:
+    """Single CCU event, (interface, deviceID, param, value)."""
+
+    __slots__ = ("interface", "deviceID", "param", "value")
+
+    def __init__(self, args: tuple) -> None:
+        self.interface, self.deviceID, self.param, self.value = args
+
+    def __repr__(self) -> str:
+        return (
+            f"{{'interface': {self.interface!r}, 'deviceID': {self.deviceID!r}, "
+            f"'param': {self.param!r}, 'value': {self.value!r}}}"
+        )
+
 
 class RequestHandler(SimpleXMLRPCRequestHandler):
     """Custom request handler that stores client address."""
@@ -23,6 +46,35 @@ class RequestHandler(SimpleXMLRPCRequestHandler):
         super().do_POST()
 
 
+class _ThreadedXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
+    """XML-RPC server handling requests on a bounded worker pool."""
+
+    def __init__(self, *args, max_workers: int, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="xmlrpc-worker"
+        )
+
+    @property
+    def current_client_ip(self) -> Optional[str]:
+        """Client IP of the request handled by the current thread."""
+        return getattr(self._local, "client_ip", None)
+
+    @current_client_ip.setter
+    def current_client_ip(self, value: Optional[str]) -> None:
+        self._local.client_ip = value
+
+    def process_request(self, request, client_address) -> None:
+        """Hand the request to the worker pool instead of a new thread."""
+        self._pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self) -> None:
+        """Close the socket and wait for in-flight requests."""
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
 class XMLRPCServer:
     """HomeMatic XML-RPC Server implementation."""
 
@@ -38,6 +90,14 @@ class XMLRPCServer:
     )
     STATE_URL = "http://localhost:82"
     REQUEST_TIMEOUT = 10
+    WRITE_QUEUE_SIZE = 10_000
+    WRITE_BATCH_SIZE = 200
+    DROP_LOG_EVERY = 1000  # dropped rows per warning
+    WRITER_STOP_TIMEOUT = 60.0  # seconds, below systemd's default stop timeout
+    MAX_WORKERS = 32
+    STATE_POOL_CONNECTIONS = 4
+    STATE_POOL_MAXSIZE = 16
+    NOTIFY_WORKERS = 2
 
     def __str__(self) -> str:
         """String representation of server configuration."""
@@ -57,7 +117,7 @@ class XMLRPCServer:
         logger: logging.Logger,
         ccu_device_ids: Tuple[str, ...],
         db_file: str,
-        allowed_clients: Tuple[str],
+        allowed_clients: Optional[Tuple[str, ...]] = None,
         server_id: Optional[str] = None,
         ccu_parameters: Optional[Tuple[str]] = None,
         state_device_ids: Optional[Tuple[str]] = None,
@@ -66,28 +126,53 @@ class XMLRPCServer:
         self.host = host
         self.port = port
         self.ccu_device_ids = ccu_device_ids
+        self._device_id_set = frozenset(ccu_device_ids or ())
         self.db_file = db_file
         self.allowed_clients = allowed_clients
+        if not allowed_clients:
+            self.logger.warning("No allowed clients configured, IP filtering is off")
+        # Single IPs become /32 or /128 networks
+        self._allowed_nets = tuple(
+            ip_network(allowed, strict=False) for allowed in allowed_clients or ()
+        )
         self.server_id = server_id or f"{host}:{port}"
         self.ccu_parameters = ccu_parameters or self.CCU_PARAMETER_LIST
         self.state_device_ids = state_device_ids
+        self._ccu_param_set = frozenset(sys.intern(p) for p in self.ccu_parameters)
+        self._state_device_set = frozenset(state_device_ids or ())
         self._device_states = {}
+        self._state_lock = threading.Lock()
         self.database = Database(db_file=self.db_file, logger=logging.getLogger("db"))
-        self._log_lock = Lock()
+        self.database.connect()
+        self.database._create_device_table()
+        self._write_q: queue.Queue = queue.Queue(maxsize=self.WRITE_QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        # next() on itertools.count is atomic, safe across worker threads
+        self._dropped = itertools.count(1)
+        self._http = self._create_session()
+        # State notifications run off the XML-RPC dispatch threads
+        self._notify_pool = ThreadPoolExecutor(
+            max_workers=self.NOTIFY_WORKERS, thread_name_prefix="notify"
+        )
+        # Pending notifications, cancelled on stop() (no cancel_futures on 3.8)
+        self._notify_futures: Set[Future] = set()
 
         # Disable built-in logging
         logging.getLogger("xmlrpc.server").setLevel(logging.CRITICAL)
 
         # Initialize XML-RPC server
-        self.logger.debug(f"Initializing {self}")
+        self.logger.debug("Initializing %s", self)
 
-        self.server = SimpleXMLRPCServer(
-            (self.host, self.port), requestHandler=RequestHandler, logRequests=False
+        self.server = _ThreadedXMLRPCServer(
+            (self.host, self.port),
+            requestHandler=RequestHandler,
+            logRequests=False,
+            max_workers=self.MAX_WORKERS,
         )
-        self.server.current_client_ip = None
         self.server.register_instance(self)
         self.server.register_multicall_functions()
         self.server_thread: Optional[threading.Thread] = None
+        self._refresh_log_levels()
 
     def __enter__(self) -> "XMLRPCServer":
         """Context manager entry."""
@@ -98,115 +183,144 @@ class XMLRPCServer:
         """Context manager exit."""
         self.stop()
 
+    def _create_session(self) -> requests.Session:
+        """Create keep-alive session for state notifications."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.STATE_POOL_CONNECTIONS,
+            pool_maxsize=self.STATE_POOL_MAXSIZE,
+            max_retries=0,
+        )
+        session.mount("http://", adapter)
+        return session
+
+    def _refresh_log_levels(self) -> None:
+        """Cache which log levels are enabled for the event hot path."""
+        self._dbg = self.logger.isEnabledFor(logging.DEBUG)
+        self._info = self.logger.isEnabledFor(logging.INFO)
+
     def _is_ip_allowed(self) -> bool:
         """Check if client IP is allowed to access server."""
         try:
             client_ip = ip_address(self.server.current_client_ip)
 
-            for allowed in self.allowed_clients:
-                if "/" in allowed:  # Network range
-                    if client_ip in ip_network(allowed):
-                        return True
-                elif client_ip == ip_address(allowed):  # Single IP
-                    return True
+            if any(client_ip in network for network in self._allowed_nets):
+                return True
 
-            self.logger.warning(f"Unauthorized access attempt from {client_ip}")
+            self.logger.warning("Unauthorized access attempt from %s", client_ip)
             return False
         except ValueError as e:
-            self.logger.error(f"IP validation error: {e}")
+            self.logger.error("IP validation error: %s", e)
             return False
 
     def _main(self, args: tuple, event: str) -> bool:
         """Process incoming XML-RPC arguments."""
-        if not self._is_ip_allowed():
+        # No allowlist configured means IP filtering is off
+        if self.allowed_clients and not self._is_ip_allowed():
+            return False
+        # Reject wrong shapes and unknown devices before allocating anything
+        if len(args) != 4:
+            return False
+        if args[1].partition(":")[0] not in self._device_id_set:
             return False
 
-        keys = ["interface", "deviceID", "param", "value"]
-        response = dict(zip(keys, args))
-        self.logger.info(
-            f"XML-RPC from {self.server.current_client_ip} - {event}: {response}"
-        )
+        evt = _Evt(args)
+        if self._info:
+            self.logger.info(
+                "XML-RPC from %s - %s: %s", self.server.current_client_ip, event, evt
+            )
 
         """Process states update and database insertion."""
-        if self._get_device_id(response):
-            if len(args) == 4:
-                if (
-                    self.state_device_ids
-                    and response["deviceID"] in self.state_device_ids
-                ):
-                    self._update_device_state(response)
-                elif self.ccu_parameters and response["param"] in self.ccu_parameters:
-                    self._update_device_state(response)
-
-                if response["param"] == "WINDOW_STATE":
-                    self._notify_states(response)
-
-                return self._insert_into_db(response)
-
-        return False
-
-    def _get_device_id(self, refactored_args: Dict[str, Any]) -> bool:
-        """Validate and process refactored arguments."""
-        if "deviceID" not in refactored_args:
-            return False
+        if evt.deviceID in self._state_device_set:
+            self._update_device_state(evt)
+        elif evt.param in self._ccu_param_set:
+            self._update_device_state(evt)
 
-        d = refactored_args["deviceID"]
-        device_id = d.split(":")[0] if ":" in d else d
+        if evt.param == "WINDOW_STATE":
+            future = self._notify_pool.submit(self._notify_states, evt)
+            self._notify_futures.add(future)
+            future.add_done_callback(self._notify_futures.discard)
 
-        return device_id in self.ccu_device_ids
+        return self._insert_into_db(evt)
 
-    def _insert_into_db(self, data: Dict[str, Any]) -> bool:
+    def _insert_into_db(self, evt: _Evt) -> bool:
         """Insert or update device data in SQLite database."""
+        params = (evt.interface, evt.deviceID, evt.param, evt.value)
         try:
-            self.database.connect()
-            self.database._create_device_table()
-            query = """
-                INSERT INTO devices (interface, device_id, param, value, timestamp)
-                VALUES (?, ?, ?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))
-                ON CONFLICT(device_id, param) 
-                DO UPDATE SET
-                    value = excluded.value,
-                    interface = excluded.interface,
-                    timestamp = strftime('%Y-%m-%d %H:%M:%f', 'now');
-            """
-            params = (data["interface"], data["deviceID"], data["param"], data["value"])
-            self.database.execute(query, params)
-            self.logger.debug(f"Data upserted into database: {data}")
+            self._write_q.put_nowait(params)
             return True
-        except Exception as e:
-            self.logger.error(f"Failed to upsert data into database: {e}")
+        except queue.Full:
+            dropped = next(self._dropped)
+            if dropped % self.DROP_LOG_EVERY == 1:
+                self.logger.warning(
+                    "Write queue full, dropped %d rows so far, latest: %s", dropped, evt
+                )
             return False
-        finally:
-            self.database.close()
 
-    def _update_device_state(self, data: Dict[str, Any]) -> bool:
+    def _writer_loop(self) -> None:
+        """Drain queued rows and upsert them in batches."""
+        while True:
+            row = self._write_q.get()
+            if row is _SENTINEL:
+                return
+            batch = [row]
+            done = False
+            while len(batch) < self.WRITE_BATCH_SIZE:
+                try:
+                    row = self._write_q.get_nowait()
+                except queue.Empty:
+                    break
+                if row is _SENTINEL:
+                    done = True
+                    break
+                batch.append(row)
+            self._write_batch(batch)
+            if done:
+                return
+
+    def _write_batch(self, batch: List[tuple]) -> None:
+        """Upsert a batch of rows in a single transaction."""
+        try:
+            self.database.upsert_devices(batch)
+            if self._dbg:
+                self.logger.debug("Upserted %d rows into database", len(batch))
+        except Exception as e:
+            self.logger.error("Failed to upsert data into database: %s", e)
+
+    def _update_device_state(self, evt: _Evt) -> bool:
         """Update device state in memory."""
-        self.logger.debug(f"Received state change: {data}")
         try:
-            if data["deviceID"] not in self._device_states:
-                self._device_states[data["deviceID"]] = {}
-            self._device_states[data["deviceID"]][data["param"]] = data["value"]
-            self.logger.debug(
-                f"{data['deviceID']} {data['param']} changed to: {data['value']}"
-            )
-            self.logger.debug(f"Device states: {self._device_states}")
+            # Copy-on-write, readers use the published snapshot without locking
+            with self._state_lock:
+                states = dict(self._device_states)
+                params = dict(states.get(evt.deviceID, ()))
+                params[evt.param] = evt.value
+                states[evt.deviceID] = params
+                self._device_states = states
+            if self._dbg:
+                self.logger.debug("Received state change: %s", evt)
+                self.logger.debug(
+                    "%s %s changed to: %s", evt.deviceID, evt.param, evt.value
+                )
+                self.logger.debug("Device states: %r", self._device_states)
             return True
         except RequestException as e:
-            self.logger.error(f"Error notifying window state: {e}")
+            self.logger.error("Error notifying window state: %s", e)
             return False
 
-    def _notify_states(self, data: Dict[str, Any]) -> bool:
+    def _notify_states(self, evt: _Evt) -> bool:
         """Notify state change via GET request."""
-        self.logger.debug(f"Received {data['param']} change: {data}")
+        if self._dbg:
+            self.logger.debug("Received %s change: %s", evt.param, evt)
         try:
-            response = requests.get(
+            response = self._http.get(
                 self.STATE_URL,
-                params={"window_state": data["deviceID"]},
+                params={"window_state": evt.deviceID},
                 timeout=self.REQUEST_TIMEOUT,
             )
             response.raise_for_status()
         except RequestException as e:
-            self.logger.error(f"Error notifying window state: {e}")
+            self.logger.error("Error notifying window state: %s", e)
             return False
 
     # CCU XML-RPC methods
@@ -237,35 +351,58 @@ class XMLRPCServer:
     # Custom methods to interact with the server
     def get_device_states(self, device) -> Dict[str, Dict[str, Any]]:
         """Return device states."""
-        return self._device_states[device] if device in self._device_states else {}
+        return self._device_states.get(device, {})
 
     def get_all_device_states(self) -> Dict[str, Dict[str, Any]]:
         """Return all device states."""
-        self.logger.debug(f"Request from {self.server.current_client_ip}")
+        self.logger.debug("Request from %s", self.server.current_client_ip)
         return self._device_states
 
     # Server lifecycle methods
     def start(self) -> None:
         """Start the XML-RPC server in a separate thread."""
-        self.logger.debug(f"Starting server thread for {self.server_id}")
+        self._refresh_log_levels()
+        self.logger.debug("Starting server thread for %s", self.server_id)
         try:
+            self._writer = threading.Thread(
+                target=self._writer_loop, name=f"DBWriter-{self.server_id}"
+            )
+            self._writer.daemon = True
+            self._writer.start()
             self.server_thread = threading.Thread(
                 target=self.server.serve_forever, name=f"XMLRPCServer-{self.server_id}"
             )
             self.server_thread.daemon = True
             self.server_thread.start()
-            self.logger.info(f"Server {self.server_id} started successfully")
+            self.logger.info("Server %s started successfully", self.server_id)
         except Exception as e:
             self.logger.error(
-                f"Failed to start server {self.server_id}: {e}", exc_info=True
+                "Failed to start server %s: %s", self.server_id, e, exc_info=True
             )
             raise
 
     def stop(self) -> None:
         """Stop the XML-RPC server and cleanup resources."""
-        self.logger.info(f"Stopping XML-RPC server")
+        self.logger.info("Stopping XML-RPC server")
         if self.server:
             self.server.shutdown()
             self.server.server_close()
         if self.server_thread and self.server_thread.is_alive():
             self.server_thread.join(timeout=5.0)
+        if self._writer and self._writer.is_alive():
+            self._write_q.put(_SENTINEL)
+            self._writer.join(timeout=self.WRITER_STOP_TIMEOUT)
+        for future in list(self._notify_futures):
+            future.cancel()
+        # Only in-flight requests remain, each bounded by REQUEST_TIMEOUT
+        self._notify_pool.shutdown(wait=True)
+        self._http.close()
+        # Closing under a running writer would lose its batch and the queue
+        if self._writer and self._writer.is_alive():
+            self.logger.error(
+                "DB writer still busy after %.0fs, %d rows not written",
+                self.WRITER_STOP_TIMEOUT,
+                self._write_q.qsize(),
+            )
+            return
+        self.database.close()